@@ -0,0 +1 @@
+"""x-apify skill scripts (run as: python3 -m scripts.fetch_tweets)."""
@@ -4,17 +4,62 @@ Local file cache for x-apify skill.
 
 Features:
 - TTL-based expiration (1h for searches, 24h for profiles)
-- JSON file storage
+- Compact JSON file storage (metadata header line first, tweets last)
+- Uses orjson when installed, stdlib json otherwise
 - Cache stats and management
 """
 
 import hashlib
 import json
+import mmap
+import os
+import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
-from config import get_cache_dir, CACHE_TTL_SEARCH, CACHE_TTL_PROFILE, CACHE_TTL_TWEET
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .config import get_cache_dir, CACHE_TTL_SEARCH, CACHE_TTL_PROFILE, CACHE_TTL_TWEET
+
+# Upper bound on the metadata header line read by get_cache_stats
+# (queries are capped at 500 chars, so this leaves room for UTF-8)
+HEADER_MAX_BYTES = 4096
+
+# Cache files at least this large are parsed from an mmap (orjson only)
+MMAP_MIN_BYTES = 64 * 1024
+
+# Manifest of cache entries, kept up to date on writes so stats only need to
+# stat the cache files instead of opening and parsing each one
+INDEX_FILENAME = '_index.json'
+
+# Directory scans with at least this many files read headers in a thread pool
+SCAN_PARALLEL_MIN_FILES = 32
+SCAN_MAX_WORKERS = 8
+
+# Identifiers that can be used as cache filenames without hashing
+_USERNAME_KEY_RE = re.compile(r'[A-Za-z0-9_]{1,15}')
+
+_decoder = json.JSONDecoder()
+
+
+def _dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw):
+    """Parse JSON from bytes."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
 def ensure_cache_dir():
@@ -35,8 +80,14 @@ def get_cache_key(mode, identifier):
     Returns:
         Cache filename (without path)
     """
-    # Create a hash for the identifier to handle special characters
-    id_hash = hashlib.sha256(identifier.encode('utf-8')).hexdigest()[:16]
+    # Sanitized usernames and tweet IDs are already safe filenames
+    if mode == 'user' and _USERNAME_KEY_RE.fullmatch(identifier):
+        return f"user_{identifier}.json"
+    if mode == 'url' and identifier.isascii() and identifier.isdigit():
+        return f"url_{identifier}.json"
+    
+    # Hash anything else (e.g. search queries) to handle special characters
+    id_hash = hashlib.blake2b(identifier.encode('utf-8'), digest_size=8).hexdigest()
     return f"{mode}_{id_hash}.json"
 
 
@@ -56,25 +107,58 @@ def get_ttl_for_mode(mode):
         return CACHE_TTL_TWEET
 
 
+def _load_file(path):
+    """
+    Read and parse a whole JSON cache file.
+    
+    Files of MMAP_MIN_BYTES or more are parsed straight from a read-only
+    mmap when orjson is available, skipping the copy into a bytes object.
+    Smaller files are read normally after asking the kernel to read ahead.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    with os.fdopen(fd, 'rb') as f:
+        if orjson is not None and os.fstat(fd).st_size >= MMAP_MIN_BYTES:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+        return _loads(f.read())
+
+
+def _parse_fetched_at(fetched_at):
+    """Convert a legacy ISO fetched_at string to an epoch, or None if unusable."""
+    if not isinstance(fetched_at, str) or not fetched_at:
+        return None
+    
+    try:
+        fetch_time = datetime.fromisoformat(fetched_at.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    
+    if fetch_time.tzinfo is None:
+        return None
+    return fetch_time.timestamp()
+
+
 def is_cache_valid(cache_data, mode):
     """Check if cached data is still valid (not expired)."""
     if not cache_data:
         return False
     
-    fetched_at = cache_data.get('fetched_at')
-    if not fetched_at:
-        return False
+    fetched_at_epoch = cache_data.get('fetched_at_epoch')
+    if fetched_at_epoch is None:
+        # Entries written before fetched_at_epoch existed
+        fetched_at_epoch = _parse_fetched_at(cache_data.get('fetched_at'))
     
-    try:
-        # Parse ISO format timestamp
-        fetch_time = datetime.fromisoformat(fetched_at.replace('Z', '+00:00'))
-        now = datetime.now(timezone.utc)
-        age_seconds = (now - fetch_time).total_seconds()
-        
-        ttl = get_ttl_for_mode(mode)
-        return age_seconds < ttl
-    except (ValueError, TypeError):
+    if not isinstance(fetched_at_epoch, (int, float)) or isinstance(fetched_at_epoch, bool):
         return False
+    
+    return (time.time() - fetched_at_epoch) < get_ttl_for_mode(mode)
 
 
 def load_from_cache(mode, identifier):
@@ -86,24 +170,55 @@ def load_from_cache(mode, identifier):
     """
     cache_path = get_cache_path(mode, identifier)
     
-    if not cache_path.exists():
+    try:
+        mtime = cache_path.stat().st_mtime
+    except OSError:
+        return None
+    
+    # Files are written once, so mtime tracks fetched_at: skip reading
+    # entries that are clearly expired (a future mtime falls through)
+    if time.time() - mtime >= get_ttl_for_mode(mode):
+        cache_path.unlink(missing_ok=True)
+        _remove_from_index(cache_path.name)
         return None
     
     try:
-        with open(cache_path, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
+        cache_data = _load_file(cache_path)
         
         if is_cache_valid(cache_data, mode):
             return cache_data
         else:
             # Expired, delete the file
             cache_path.unlink(missing_ok=True)
+            _remove_from_index(cache_path.name)
             return None
             
     except (json.JSONDecodeError, IOError, OSError):
         return None
 
 
+def _atomic_write(path, content):
+    """
+    Write bytes to path via a temp file in the same directory and os.replace,
+    so readers never see a partially written file.
+    
+    Raises:
+        OSError: if the write or rename fails (the temp file is removed,
+            also on KeyboardInterrupt)
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def save_to_cache(mode, identifier, data):
     """
     Save data to cache.
@@ -112,27 +227,176 @@ def save_to_cache(mode, identifier, data):
         mode: 'search', 'user', or 'url'
         identifier: query string, username, or tweet URL
         data: Data to cache (will add metadata)
+    
+    Returns:
+        True if the entry was written, False otherwise
     """
-    ensure_cache_dir()
     cache_path = get_cache_path(mode, identifier)
     
     # Add cache metadata
-    cache_data = {
+    header = {
         'mode': mode,
         'identifier': identifier,
         'fetched_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-        **data
+        'fetched_at_epoch': int(time.time()),
+        'count': data.get('count', 0),
     }
+    header.update((k, v) for k, v in data.items() if k != 'tweets')
+    
+    # Metadata goes on the first line so stats can read it without parsing tweets
+    header_line = _dumps(header)[:-1]
+    tweets = _dumps(data.get('tweets', []))
+    
+    content = header_line + b',\n"tweets":' + tweets + b'}\n'
+    
+    try:
+        ensure_cache_dir()
+        _atomic_write(cache_path, content)
+    except OSError:
+        return False
+    
+    _update_index(cache_path, header)
+    return True
+
+
+def read_cache_header(cache_path):
+    """
+    Read only the metadata of a cache file.
+    
+    Decodes the first line written by save_to_cache and falls back to a
+    full parse for files in any other layout.
+    
+    Returns:
+        Dict with the cache metadata (may include tweets on fallback)
+    """
+    with open(cache_path, 'rb') as f:
+        line = f.readline(HEADER_MAX_BYTES)
+        try:
+            prefix = line.decode('utf-8').rstrip()
+            if prefix.startswith('{') and prefix.endswith(','):
+                data, _ = _decoder.raw_decode(prefix[:-1] + '}')
+                return data
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            pass
     
+    return _load_file(cache_path)
+
+
+def _read_index(cache_dir):
+    """Read the cache manifest, or None if it is missing or unreadable."""
+    try:
+        with open(cache_dir / INDEX_FILENAME, 'rb') as f:
+            index = _loads(f.read())
+    except (ValueError, IOError, OSError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def _write_index(cache_dir, index):
+    """Atomically replace the cache manifest."""
     try:
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-    except (IOError, OSError) as e:
-        print(f"Warning: Could not save to cache: {e}", file=sys.stderr)
+        _atomic_write(cache_dir / INDEX_FILENAME, _dumps(index))
+    except OSError:
+        pass
+
+
+def _update_index(cache_path, header):
+    """
+    Upsert an entry in the cache manifest.
+    
+    A missing manifest is left missing; get_cache_stats rebuilds it from a
+    full directory scan so entries written before it existed are not lost.
+    """
+    cache_dir = get_cache_dir()
+    index = _read_index(cache_dir)
+    if index is None:
+        return
+    
+    try:
+        st = os.stat(cache_path)
+    except OSError:
+        return
+    
+    index[cache_path.name] = _index_entry(header, st)
+    _write_index(cache_dir, index)
+
+
+def _remove_from_index(cache_key):
+    """Drop a deleted cache file from the manifest."""
+    cache_dir = get_cache_dir()
+    index = _read_index(cache_dir)
+    if index is None or cache_key not in index:
+        return
+    
+    del index[cache_key]
+    _write_index(cache_dir, index)
+
+
+def _index_entry(data, st):
+    """Build one manifest entry from cache metadata and the file's stat."""
+    return {
+        'mode': data.get('mode', 'unknown'),
+        'identifier': data.get('identifier', ''),
+        'fetched_at': data.get('fetched_at', 'Unknown'),
+        'fetched_at_epoch': data.get('fetched_at_epoch'),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'count': data.get('count', 0)
+    }
+
+
+def _parse_cache_entry(name, path, st):
+    """Build one manifest entry from a cache file's header."""
+    try:
+        data = read_cache_header(path)
+        if isinstance(data, dict):
+            return _index_entry({'identifier': name[:-5], **data}, st)
+    except (json.JSONDecodeError, IOError):
+        pass
+    return _index_entry({'mode': 'corrupt', 'identifier': name[:-5]}, st)
+
+
+def _scan_cache_dir(cache_dir, index):
+    """
+    Reconcile manifest entries with the cache files on disk.
+    
+    Entries whose file still has the recorded size and mtime are kept as-is;
+    only new or changed files have their header read, and entries for files
+    that no longer exist are dropped. This catches anything the manifest
+    missed (files removed by hand, failed manifest writes, concurrent saves).
+    """
+    files = []
+    
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if (not entry.name.endswith('.json') or entry.name == INDEX_FILENAME
+                    or not entry.is_file()):
+                continue
+            files.append((entry.name, entry.path, entry.stat()))
+    
+    result = {}
+    stale = []
+    for name, path, st in files:
+        known = index.get(name)
+        if (isinstance(known, dict) and known.get('size') == st.st_size
+                and known.get('mtime_ns') == st.st_mtime_ns):
+            result[name] = known
+        else:
+            stale.append((name, path, st))
+    
+    if len(stale) < SCAN_PARALLEL_MIN_FILES:
+        parsed = [_parse_cache_entry(*f) for f in stale]
+    else:
+        # File reads release the GIL, so a few threads overlap the I/O waits
+        with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS) as executor:
+            parsed = list(executor.map(_parse_cache_entry, *zip(*stale)))
+    
+    result.update((name, entry) for (name, _, _), entry in zip(stale, parsed))
+    return result
 
 
 def clear_cache():
-    """Delete all cached files."""
+    """Delete all cached files, the manifest and any leftover temp files."""
     cache_dir = get_cache_dir()
     
     if not cache_dir.exists():
@@ -140,12 +404,18 @@ def clear_cache():
         return 0
     
     count = 0
-    for cache_file in cache_dir.glob("*.json"):
-        try:
-            cache_file.unlink()
-            count += 1
-        except OSError:
-            pass
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            # Temp files are left behind only if a write was killed mid-way
+            is_tmp = '.json.tmp.' in entry.name
+            if not entry.name.endswith('.json') and not is_tmp:
+                continue
+            try:
+                os.unlink(entry.path)
+                if entry.name != INDEX_FILENAME and not is_tmp:
+                    count += 1
+            except OSError:
+                pass
     
     print(f"Cleared {count} cached result(s).")
     return count
@@ -158,41 +428,33 @@ def get_cache_stats():
     if not cache_dir.exists():
         return {'count': 0, 'total_size': 0, 'entries': [], 'expired': 0}
     
+    # Check the manifest against the directory (stat only) and re-read just
+    # the files it does not match; a missing manifest is rebuilt in full
+    cached_index = _read_index(cache_dir) or {}
+    index = _scan_cache_dir(cache_dir, cached_index)
+    if index != cached_index:
+        _write_index(cache_dir, index)
+    
     entries = []
     total_size = 0
     expired = 0
     
-    for cache_file in cache_dir.glob("*.json"):
-        size = cache_file.stat().st_size
-        total_size += size
+    for data in index.values():
+        mode = data.get('mode', 'unknown')
+        is_valid = mode != 'corrupt' and is_cache_valid(data, mode)
         
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            mode = data.get('mode', 'unknown')
-            is_valid = is_cache_valid(data, mode)
-            
-            if not is_valid:
-                expired += 1
-            
-            entries.append({
-                'mode': mode,
-                'identifier': data.get('identifier', cache_file.stem)[:50],
-                'fetched_at': data.get('fetched_at', 'Unknown'),
-                'size': size,
-                'valid': is_valid,
-                'count': data.get('count', 0)
-            })
-        except (json.JSONDecodeError, IOError):
-            entries.append({
-                'mode': 'corrupt',
-                'identifier': cache_file.stem,
-                'fetched_at': 'Unknown',
-                'size': size,
-                'valid': False,
-                'count': 0
-            })
+        if not is_valid and mode != 'corrupt':
+            expired += 1
+        
+        total_size += data.get('size', 0)
+        entries.append({
+            'mode': mode,
+            'identifier': str(data.get('identifier', ''))[:50],
+            'fetched_at': data.get('fetched_at', 'Unknown'),
+            'size': data.get('size', 0),
+            'valid': is_valid,
+            'count': data.get('count', 0)
+        })
     
     return {
         'count': len(entries),
@@ -3,6 +3,7 @@
 Configuration helpers for x-apify skill.
 """
 
+import functools
 import os
 import re
 import sys
@@ -21,7 +22,24 @@ CACHE_TTL_SEARCH = 3600       # 1 hour for searches
 CACHE_TTL_PROFILE = 86400     # 24 hours for user profiles
 CACHE_TTL_TWEET = 86400       # 24 hours for specific tweets
 
+# Deletion table for str.translate: control characters (except normal
+# whitespace) plus zero-width, bidi and other unicode format characters
+_QUERY_DEL = dict.fromkeys(
+    [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0),
+     *range(0x200b, 0x2010), *range(0x2028, 0x2030), *range(0x2060, 0x2070), 0xfeff]
+)
 
+# Precompiled patterns for sanitizing input and parsing URLs
+_USER_BAD_RE = re.compile(r'[^a-zA-Z0-9_]')
+_STATUS_RE = re.compile(r'/status/(\d+)')
+_TWEET_ID_RE = re.compile(r'^\d{10,}$')
+_PROFILE_RE = re.compile(r'(?:twitter\.com|x\.com)/([a-zA-Z0-9_]+)(?:/|$|\?)')
+
+# Path segments on x.com that are not usernames
+RESERVED_PATHS = frozenset(('status', 'search', 'explore', 'home', 'i', 'intent'))
+
+
+@functools.lru_cache(maxsize=1)
 def get_skill_dir():
     """Get the skill root directory."""
     return Path(__file__).parent.parent
@@ -40,13 +58,20 @@ def get_api_token():
     return token
 
 
+@functools.lru_cache(maxsize=1)
 def get_actor_id():
-    """Get Apify actor ID from environment or use default."""
+    """Get Apify actor ID from environment or use default (read once per process)."""
     return os.environ.get("APIFY_ACTOR_ID", DEFAULT_ACTOR_ID)
 
 
+@functools.lru_cache(maxsize=1)
 def get_cache_dir():
-    """Get cache directory from environment or use default."""
+    """
+    Get cache directory from environment or use default.
+    
+    The result is cached; call get_cache_dir.cache_clear() after changing
+    X_APIFY_CACHE_DIR within the same process.
+    """
     env_dir = os.environ.get("X_APIFY_CACHE_DIR")
     if env_dir:
         return Path(env_dir)
@@ -57,24 +82,19 @@ def sanitize_query(query):
     """
     Sanitize search query for safety.
     
-    - Removes control characters
     - Limits length
+    - Removes control characters
     - Strips whitespace
     """
     if not query:
         return ""
     
-    # Remove control characters (except normal whitespace)
-    query = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', query)
-    
-    # Remove unicode control characters
-    query = re.sub(r'[\u200b-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', query)
+    # Limit length first so oversized input is never scanned in full
+    query = query[:MAX_QUERY_LENGTH]
     
-    # Limit length
-    if len(query) > MAX_QUERY_LENGTH:
-        query = query[:MAX_QUERY_LENGTH]
-    
-    return query.strip()
+    # Remove control characters (except normal whitespace) and unicode
+    # control characters in a single pass
+    return query.translate(_QUERY_DEL).strip()
 
 
 def sanitize_username(username):
@@ -91,11 +111,9 @@ def sanitize_username(username):
     # Remove @ prefix
     username = username.lstrip('@')
     
-    # Remove control characters
-    username = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', username)
-    
     # Twitter usernames: alphanumeric and underscores, max 15 chars
-    username = re.sub(r'[^a-zA-Z0-9_]', '', username)
+    # (this also drops any control characters)
+    username = _USER_BAD_RE.sub('', username)
     
     return username[:15]
 
@@ -113,12 +131,12 @@ def extract_tweet_id(url):
         return None
     
     # Match status ID in URL
-    match = re.search(r'/status/(\d+)', url)
+    match = _STATUS_RE.search(url)
     if match:
         return match.group(1)
     
     # Maybe it's just the tweet ID
-    if re.match(r'^\d{10,}$', url):
+    if _TWEET_ID_RE.match(url):
         return url
     
     return None
@@ -130,11 +148,11 @@ def extract_username_from_url(url):
         return None
     
     # Match username in URL path
-    match = re.search(r'(?:twitter\.com|x\.com)/([a-zA-Z0-9_]+)(?:/|$|\?)', url)
+    match = _PROFILE_RE.search(url)
     if match:
         username = match.group(1)
         # Exclude reserved paths
-        if username.lower() not in ('status', 'search', 'explore', 'home', 'i', 'intent'):
+        if username.lower() not in RESERVED_PATHS:
             return username
     
     return None
@@ -2,36 +2,41 @@
 """
 Fetch X/Twitter data via Apify API with local caching.
 
-Usage:
-    python3 fetch_tweets.py --search "query"
-    python3 fetch_tweets.py --user "username"
-    python3 fetch_tweets.py --url "https://x.com/user/status/123"
-    python3 fetch_tweets.py --cache-stats
-    python3 fetch_tweets.py --clear-cache
+Usage (from the skill root):
+    python3 -m scripts.fetch_tweets --search "query"
+    python3 -m scripts.fetch_tweets --user "username"
+    python3 -m scripts.fetch_tweets --url "https://x.com/user/status/123"
+    python3 -m scripts.fetch_tweets --cache-stats
+    python3 -m scripts.fetch_tweets --clear-cache
 
 Requires:
     - APIFY_API_TOKEN environment variable
     - requests library (pip install requests)
+    - orjson library (optional, pip install orjson)
 """
 
 import argparse
 import json
+import os
 import sys
 import time
 from datetime import datetime, timezone
 
-# Add scripts directory to path for imports
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("Error: 'requests' library not installed.", file=sys.stderr)
     print("Install with: pip install requests", file=sys.stderr)
     sys.exit(1)
 
-from config import (
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .config import (
     APIFY_API_BASE,
     DEFAULT_MAX_RESULTS,
     get_api_token,
@@ -41,13 +46,31 @@ from config import (
     extract_tweet_id,
     extract_username_from_url,
 )
-from cache import (
+from .cache import (
     load_from_cache,
     save_to_cache,
     clear_cache,
     print_cache_stats,
 )
 
+# Dataset fields read by format_results; everything else is left out of the download
+DATASET_FIELDS = (
+    "id", "id_str", "text", "full_text", "author", "user",
+    "createdAt", "created_at", "likeCount", "favorite_count",
+    "retweetCount", "retweet_count", "replyCount", "conversation_count",
+    "url", "twitterUrl",
+)
+
+# Shared session so the status polls and dataset fetch reuse the TLS
+# connection opened to start the run. Retry only covers idempotent
+# requests, so starting an actor run is never repeated.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+))
+
 
 def run_apify_actor(input_data, api_token):
     """
@@ -58,21 +81,17 @@ def run_apify_actor(input_data, api_token):
         api_token: Apify API token
     
     Returns:
-        List of tweet objects from the actor
+        Iterator over tweet objects from the actor's dataset
     """
     actor_id = get_actor_id()
     run_url = f"{APIFY_API_BASE}/acts/{actor_id}/runs"
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_token}"
-    }
+    _SESSION.headers["Authorization"] = f"Bearer {api_token}"
     
     try:
         # Start the run
-        response = requests.post(
+        response = _SESSION.post(
             run_url,
-            headers=headers,
             json=input_data,
             timeout=30
         )
@@ -97,15 +116,12 @@ def run_apify_actor(input_data, api_token):
     # Wait for completion
     status_url = f"{APIFY_API_BASE}/actor-runs/{run_id}"
     max_wait = 180  # seconds (tweets can take longer)
+    delay = 1.0  # poll backoff: 1s, 1.5s, 2.25s, ... capped at 10s
     start_time = time.time()
     
     while time.time() - start_time < max_wait:
         try:
-            response = requests.get(
-                status_url,
-                headers={"Authorization": f"Bearer {api_token}"},
-                timeout=10
-            )
+            response = _SESSION.get(status_url, timeout=10)
             response.raise_for_status()
             status_data = response.json()["data"]
             status = status_data["status"]
@@ -116,7 +132,12 @@ def run_apify_actor(input_data, api_token):
                 print(f"Error: Apify actor {status.lower()}.", file=sys.stderr)
                 sys.exit(1)
             
-            time.sleep(3)
+            # Honor the server's hint when it gives one
+            retry_after = response.headers.get("Retry-After", "")
+            wait = float(retry_after) if retry_after.isdigit() else delay
+            remaining = max_wait - (time.time() - start_time)
+            time.sleep(max(0, min(wait, remaining)))
+            delay = min(delay * 1.5, 10)
             
         except requests.exceptions.RequestException as e:
             print(f"Error checking status: {e}", file=sys.stderr)
@@ -129,20 +150,34 @@ def run_apify_actor(input_data, api_token):
     dataset_id = status_data["defaultDatasetId"]
     dataset_url = f"{APIFY_API_BASE}/datasets/{dataset_id}/items"
     
+    params = {
+        "format": "jsonl",
+        "clean": "true",
+        "fields": ",".join(DATASET_FIELDS),
+    }
+    
     try:
-        response = requests.get(
-            dataset_url,
-            headers={"Authorization": f"Bearer {api_token}"},
-            timeout=30
-        )
+        response = _SESSION.get(dataset_url, params=params, timeout=30, stream=True)
         response.raise_for_status()
-        results = response.json()
-        
-        return results
-        
     except requests.exceptions.RequestException as e:
         print(f"Error fetching results: {e}", file=sys.stderr)
         sys.exit(1)
+    
+    return iter_dataset_items(response)
+
+
+def iter_dataset_items(response):
+    """Parse a streamed JSON Lines dataset response one item at a time."""
+    loads = orjson.loads if orjson is not None else json.loads
+    try:
+        for line in response.iter_lines():
+            if line:
+                yield loads(line)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching results: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        response.close()
 
 
 def search_tweets(query, max_results, api_token, use_cache):
@@ -172,8 +207,8 @@ def search_tweets(query, max_results, api_token, use_cache):
     formatted = format_results('search', query, results)
     
     # Save to cache
-    if use_cache:
-        save_to_cache('search', query, formatted)
+    if use_cache and not save_to_cache('search', query, formatted):
+        print("Warning: Could not save to cache.", file=sys.stderr)
     
     return formatted, False
 
@@ -205,8 +240,8 @@ def get_user_tweets(username, max_results, api_token, use_cache):
     formatted = format_results('user', username, results)
     
     # Save to cache
-    if use_cache:
-        save_to_cache('user', username, formatted)
+    if use_cache and not save_to_cache('user', username, formatted):
+        print("Warning: Could not save to cache.", file=sys.stderr)
     
     return formatted, False
 
@@ -242,16 +277,14 @@ def get_tweet_by_url(url, api_token, use_cache):
     formatted = format_results('url', url, results)
     
     # Save to cache
-    if use_cache:
-        save_to_cache('url', tweet_id, formatted)
+    if use_cache and not save_to_cache('url', tweet_id, formatted):
+        print("Warning: Could not save to cache.", file=sys.stderr)
     
     return formatted, False
 
 
-def format_results(mode, identifier, raw_results):
-    """Format raw Apify results into standardized output."""
-    tweets = []
-    
+def iter_formatted_tweets(raw_results):
+    """Yield standardized tweet dicts from raw Apify items as they arrive."""
     for item in raw_results:
         # Support both kaitoeasyapi schema (author.userName) and legacy (user.screen_name)
         author_obj = item.get('author') or item.get('user') or {}
@@ -274,7 +307,12 @@ def format_results(mode, identifier, raw_results):
         if not tweet['url'] and tweet['author'] and tweet['id']:
             tweet['url'] = f"https://x.com/{tweet['author']}/status/{tweet['id']}"
         
-        tweets.append(tweet)
+        yield tweet
+
+
+def format_results(mode, identifier, raw_results):
+    """Format raw Apify results into standardized output."""
+    tweets = list(iter_formatted_tweets(raw_results))
     
     return {
         'query': identifier,
@@ -287,36 +325,38 @@ def format_results(mode, identifier, raw_results):
 
 def format_output_json(data):
     """Format data as JSON string."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
     return json.dumps(data, indent=2, ensure_ascii=False)
 
 
 def format_output_summary(data):
     """Format data as human-readable summary."""
-    lines = []
-    
     mode_labels = {
         'search': 'Search Results',
         'user': 'User Tweets',
         'url': 'Tweet Details',
     }
     
-    lines.append(f"=== X/Twitter {mode_labels.get(data['mode'], 'Results')} ===")
-    lines.append(f"Query: {data['query']}")
-    lines.append(f"Fetched: {data['fetched_at']}")
-    lines.append(f"Results: {data['count']} tweets")
-    lines.append("")
-    
-    for tweet in data['tweets']:
-        lines.append("---")
-        lines.append(f"@{tweet['author']} ({tweet['author_name']})")
-        lines.append(f"{tweet['created_at']}")
-        lines.append(tweet['text'])
-        lines.append(f"[Likes: {tweet['likes']} | RTs: {tweet['retweets']} | Replies: {tweet['replies']}]")
-        if tweet['url']:
-            lines.append(tweet['url'])
-        lines.append("")
-    
-    return "\n".join(lines)
+    header = (
+        f"=== X/Twitter {mode_labels.get(data['mode'], 'Results')} ===\n"
+        f"Query: {data['query']}\n"
+        f"Fetched: {data['fetched_at']}\n"
+        f"Results: {data['count']} tweets\n"
+    )
+    
+    # One string per tweet instead of one list entry per line
+    parts = [
+        f"---\n"
+        f"@{t['author']} ({t['author_name']})\n"
+        f"{t['created_at']}\n"
+        f"{t['text']}\n"
+        f"[Likes: {t['likes']} | RTs: {t['retweets']} | Replies: {t['replies']}]\n"
+        + (f"{t['url']}\n" if t['url'] else "")
+        for t in data['tweets']
+    ]
+    
+    return "\n".join([header, *parts])
 
 
 def main():